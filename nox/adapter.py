@@ -1,4 +1,11 @@
+import copy
+import heapq
+import importlib
 import inspect
+import itertools
+import threading
+import time
+import types
 
 from nox import magic
 
@@ -10,6 +17,65 @@ class Adaptation (magic.NamedTuple):
     provided
 
 
+class Index (magic.NamedTuple):
+
+    adapted
+
+    provided
+
+
+class Lazy:
+
+    def __init__(self, path):
+        self.path = path
+        self.factory = None
+
+    def __repr__(self):
+        return '<Lazy {}>'.format(self.path)
+
+    def __call__(self, object):
+        return self.load()(object)
+
+    def load(self):
+        if self.factory is None:
+            self.factory = load(self.path)
+        return self.factory
+
+
+class Statistics:
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.hits = 0
+        self.misses = 0
+        self.paths = {}
+
+    def snapshot(self):
+        paths = {}
+        for adaptation, (calls, errors, seconds, length) in self.paths.items():
+            paths[adaptation] = dict(calls=calls, errors=errors,
+                                     seconds=seconds, length=length)
+        return dict(hits=self.hits, misses=self.misses, paths=paths)
+
+    def record(self, adaptation, hit, chain, seconds):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        try:
+            counters = self.paths[adaptation]
+        except KeyError:
+            counters = self.paths[adaptation] = [0, 0, 0.0, None]
+        counters[0] += 1
+        if chain is None:
+            counters[1] += 1
+        else:
+            counters[2] += seconds
+            counters[3] = len(chain)
+        if self.hook is not None:
+            self.hook(adaptation, chain, seconds)
+
+
 class AdaptationError (TypeError):
 
     def __str__(self):
@@ -21,39 +87,346 @@ class AdaptationError (TypeError):
 class Registry:
 
     def __init__(self):
-        self._adapters = {}
+        self._lock = threading.RLock()
+        self._snapshot = _Snapshot()
+        self._statistics = None
 
     def __iadd__(self, factory):
-        self._adapters[infer(factory)] = factory
+        if isinstance(factory, str):
+            self._register(None, factory)
+        else:
+            self._register(infer(factory), factory)
         return self
 
     def __getitem__(self, path):
-        try:
-            return self._adapters[path.start, path.stop]
-        except KeyError:
-            for adapted, provided in self._adapters:
-                if issubclass(provided, path.stop):
-                    factory = self[adapted:provided]
-                    if issubclass(path.start, adapted):
-                        return factory
-                    chain = self[path.start:adapted]
-                    return lambda x: factory(chain(x))
+        factory = self.lookup(path.start, path.stop)
+        if factory is None:
             raise AdaptationError(path.start, path.stop)
+        return factory
 
     def __setitem__(self, path, factory):
-        adaptation = Adaptation(path.start, path.stop)
-        self._adapters[adaptation] = factory
+        cost = 1 if path.step is None else path.step
+        self._register(Adaptation(path.start, path.stop), factory, cost)
 
     def __call__(self, object, protocol, alternate=...):
+        if self._statistics is not None:
+            return self._measure(object, protocol, alternate)
         if isinstance(object, protocol):
             return object
-        try:
-            return self[type(object):protocol](object)
-        except AdaptationError:
-            if alternate is ...:
-                raise
+        factory = self.lookup(type(object), protocol)
+        if factory is not None:
+            return factory(object)
+        if alternate is ...:
+            raise AdaptationError(type(object), protocol)
         return alternate
 
+    def instrument(self, hook=None):
+        self._statistics = Statistics(hook)
+        return self._statistics
+
+    def uninstrument(self):
+        self._statistics = None
+
+    def _measure(self, object, protocol, alternate):
+        statistics = self._statistics
+        adaptation = Adaptation(type(object), protocol)
+        if isinstance(object, protocol):
+            statistics.record(adaptation, True, (), 0.0)
+            return object
+        hit = adaptation in self._snapshot.resolved
+        factory = self.lookup(*adaptation)
+        if factory is None:
+            statistics.record(adaptation, hit, None, 0.0)
+            if alternate is ...:
+                raise AdaptationError(*adaptation)
+            return alternate
+        chain = self._snapshot.chains.get(adaptation)
+        start = time.perf_counter()
+        result = factory(object)
+        statistics.record(adaptation, hit, chain, time.perf_counter() - start)
+        return result
+
+    def lookup(self, adapted, provided, default=None):
+        snapshot = self._snapshot
+        try:
+            factory = snapshot.resolved[adapted, provided]
+        except KeyError:
+            if snapshot.pending:
+                snapshot = self._settle()
+            factory = snapshot.resolve(adapted, provided)
+            if factory is None and snapshot.failed:
+                snapshot = self._retry()
+                factory = snapshot.resolve(adapted, provided)
+        return default if factory is None else factory
+
+    def adapt_many(self, objects, protocol, alternate=...):
+        factories = {}
+        for object in objects:
+            try:
+                factory = factories[type(object)]
+            except KeyError:
+                factory = factories[type(object)] = self._adapter(
+                    object, protocol, alternate)
+            yield factory(object)
+
+    def adapt_grouped(self, objects, protocol, alternate=...):
+        buckets = {}
+        for object in objects:
+            buckets.setdefault(type(object), []).append(object)
+        for bucket in buckets.values():
+            factory = self._adapter(bucket[0], protocol, alternate)
+            bucket[:] = map(factory, bucket)
+        return buckets
+
+    def _adapter(self, object, protocol, alternate):
+        if isinstance(object, protocol):
+            return identity
+        factory = self.lookup(type(object), protocol)
+        if factory is not None:
+            return factory
+        if alternate is ...:
+            raise AdaptationError(type(object), protocol)
+        return lambda object: alternate
+
+    @property
+    def index(self):
+        snapshot = self._settle()
+        return Index(types.MappingProxyType(snapshot.by_adapted),
+                     types.MappingProxyType(snapshot.by_provided))
+
+    def explain(self, adapted, provided):
+        chain = self._settle().chain(adapted, provided)
+        if chain is None:
+            raise AdaptationError(adapted, provided)
+        return chain
+
+    @property
+    def failures(self):
+        return tuple((factory, error) for (_, factory, _), error
+                     in self._settle().failed)
+
+    def freeze(self):
+        return FrozenRegistry(self._settle())
+
+    def _register(self, adaptation, factory, cost=1):
+        lazy = adaptation is None or isinstance(factory, str) or any(
+            isinstance(t, str) for t in adaptation)
+        with self._lock:
+            snapshot = self._snapshot
+            if lazy or snapshot.pending:
+                snapshot = snapshot.defer(adaptation, factory, cost)
+            else:
+                snapshot = snapshot.extend(adaptation, factory, cost)
+            self._snapshot = snapshot
+
+    def _settle(self):
+        with self._lock:
+            while self._snapshot.pending:
+                snapshot = self._snapshot
+                settled = snapshot.settle()
+                if self._snapshot is snapshot:
+                    self._snapshot = settled
+            return self._snapshot
+
+    def _retry(self):
+        with self._lock:
+            snapshot = self._settle()
+            retried = snapshot.retry()
+            if len(retried.failed) < len(snapshot.failed):
+                self._snapshot = retried
+            return self._snapshot
+
+
+class FrozenRegistry (Registry):
+
+    def __init__(self, snapshot):
+        super().__init__()
+        self._snapshot = snapshot
+        known = set(snapshot.by_adapted) | set(snapshot.by_provided)
+        for adapted in known:
+            for provided in known:
+                if adapted is not provided:
+                    self.lookup(adapted, provided)
+
+    def _register(self, adaptation, factory, cost=1):
+        raise TypeError('frozen registry cannot be modified')
+
+
+class _Snapshot:
+
+    def __init__(self):
+        self.adapters = {}
+        self.costs = {}
+        self.by_adapted = {}
+        self.by_provided = {}
+        self.virtual = ()
+        self.closure = {}
+        self.pending = ()
+        self.failed = ()
+        self.resolved = {}
+        self.chains = {}
+        self.subtypes = {}
+
+    def derive(self):
+        snapshot = copy.copy(self)
+        snapshot.resolved = {}
+        snapshot.chains = {}
+        snapshot.subtypes = {}
+        return snapshot
+
+    def defer(self, adaptation, factory, cost):
+        snapshot = self.derive()
+        snapshot.pending += (adaptation, factory, cost),
+        return snapshot
+
+    def settle(self):
+        snapshot = self.derive()
+        snapshot.pending = ()
+        for entry in self.pending:
+            adaptation, factory, cost = entry
+            try:
+                if isinstance(factory, str):
+                    factory = Lazy(factory)
+                if adaptation is None:
+                    adaptation = infer(factory.load())
+                else:
+                    adaptation = Adaptation(*(
+                        load(t) if isinstance(t, str) else t
+                        for t in adaptation))
+            except Exception as error:
+                snapshot.failed += (entry, error),
+                continue
+            snapshot = snapshot.extend(adaptation, factory, cost)
+        return snapshot
+
+    def retry(self):
+        snapshot = self.derive()
+        snapshot.pending = tuple(entry for entry, _ in self.failed)
+        snapshot.failed = ()
+        return snapshot.settle()
+
+    def extend(self, adaptation, factory, cost):
+        snapshot = self.derive()
+        snapshot.adapters = dict(self.adapters)
+        snapshot.adapters[adaptation] = factory
+        snapshot.costs = dict(self.costs)
+        snapshot.costs[adaptation] = cost
+
+        snapshot.by_adapted = dict(self.by_adapted)
+        snapshot.by_provided = dict(self.by_provided)
+        for index, key in ((snapshot.by_adapted, adaptation.adapted),
+                           (snapshot.by_provided, adaptation.provided)):
+            known = index.get(key, ())
+            if adaptation not in known:
+                index[key] = known + (adaptation,)
+        if virtual(adaptation.adapted) and (
+                adaptation.adapted not in self.virtual):
+            snapshot.virtual += adaptation.adapted,
+        snapshot.closure = {}
+        return snapshot
+
+    def resolve(self, adapted, provided):
+        chain = self.chain(adapted, provided)
+        factory = chain and self.compose(chain)
+        self.chains[adapted, provided] = chain
+        self.resolved[adapted, provided] = factory
+        return factory
+
+    def chain(self, adapted, provided):
+        exact = Adaptation(adapted, provided)
+        subtypes = self.satisfying(provided)
+        for adaptation, (cost, chain) in self.reachable(adapted):
+            if adaptation.provided in subtypes:
+                if exact in self.costs and self.costs[exact] <= cost:
+                    return exact,
+                return chain
+
+    def reachable(self, start):
+        try:
+            row = self.closure[start]
+        except KeyError:
+            row = self.closure[start] = self.shortest(start)
+        return row.items()
+
+    def shortest(self, start):
+        row = {}
+        queue = []
+        order = itertools.count()
+        expanded = {start}
+
+        def expand(current, cost, chain):
+            for adaptation in self.applicable(current):
+                heapq.heappush(queue, (cost + self.costs[adaptation],
+                                       len(chain) + 1, next(order),
+                                       chain + (adaptation,)))
+
+        expand(start, 0, ())
+        while queue:
+            cost, _, _, chain = heapq.heappop(queue)
+            adaptation = chain[-1]
+            if adaptation in row:
+                continue
+            row[adaptation] = cost, chain
+            if adaptation.provided not in expanded:
+                expanded.add(adaptation.provided)
+                expand(adaptation.provided, cost, chain)
+        return row
+
+    def applicable(self, adapted):
+        mro = adapted.__mro__
+        for base in mro:
+            yield from self.by_adapted.get(base, ())
+        for base in self.virtual:
+            if base not in mro and issubclass(adapted, base):
+                yield from self.by_adapted[base]
+
+    def satisfying(self, provided):
+        try:
+            return self.subtypes[provided]
+        except KeyError:
+            pass
+        if virtual(provided):
+            subtypes = {t for t in self.by_provided
+                        if issubclass(t, provided)}
+        else:
+            subtypes = {t for t in self.by_provided
+                        if provided in t.__mro__}
+        self.subtypes[provided] = subtypes
+        return subtypes
+
+    def compose(self, chain):
+        steps = tuple(self.adapters[a] for a in chain)
+        steps = tuple(s.load() if isinstance(s, Lazy) else s for s in steps)
+        if len(steps) == 1:
+            return steps[0]
+        return pipeline(chain, steps)
+
+
+def pipeline(path, steps):
+    names = ['step{}'.format(i) for i in range(len(steps))]
+    body = ''.join('    object = {}(object)\n'.format(n) for n in names)
+    namespace = dict(zip(names, steps))
+    exec('def chain(object):\n{}    return object\n'.format(body), namespace)
+    chain = namespace['chain']
+    chain.path, chain.steps = path, steps
+    return chain
+
+
+def identity(object):
+    return object
+
+
+def virtual(cls):
+    return type(cls).__subclasscheck__ is not type.__subclasscheck__
+
+
+def load(path):
+    module, _, name = path.partition(':')
+    object = importlib.import_module(module)
+    for attribute in name.split('.'):
+        object = getattr(object, attribute)
+    return object
+
 
 def infer(factory):
     arg = 1  # compensate for 'self'
@@ -0,0 +1,235 @@
+import argparse
+import json
+import sys
+import timeit
+from numbers import Number
+
+from nox import adapter, interface, magic
+
+
+BENCHMARKS = {}
+
+SIZES = 10, 100, 1000
+
+
+def benchmark(name):
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def measure(statement, repeat=5):
+    timer = timeit.Timer(statement)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run(pattern='', repeat=5):
+    results = {}
+    for name, setup in sorted(BENCHMARKS.items()):
+        if pattern in name:
+            results[name] = measure(setup(), repeat)
+    return results
+
+
+def compare(baseline, results, threshold=0.1):
+    regressions = {}
+    for name, seconds in sorted(results.items()):
+        try:
+            ratio = seconds / baseline[name]
+        except (KeyError, ZeroDivisionError):
+            continue
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+class Base:
+    ...
+
+
+class Derived (Base):
+    ...
+
+
+def format_number(num: Number) -> str:
+    return format(num, ',')
+
+
+def registry(size):
+    registry = adapter.Registry()
+    for n in range(size):
+        registry[type('Filler{}'.format(n), (), {}):str] = repr
+    registry += format_number
+    registry[Base:int] = id
+    registry[bytes:bytearray] = bytearray
+    registry[bytearray:list] = list
+    registry[list:tuple] = tuple
+    return registry
+
+
+def registry_benchmark(kind, object, protocol):
+    for size in SIZES:
+        @benchmark('adapter.{}.{}'.format(kind, size))
+        def setup(size=size):
+            adapt = registry(size)
+            return lambda: adapt(object, protocol, None)
+
+
+registry_benchmark('direct', 5000, str)
+registry_benchmark('inherited', Derived(), int)
+registry_benchmark('chained', b'nox', tuple)
+registry_benchmark('missing', 5000, dict)
+
+
+class Counter (interface.Interface):
+
+    count = int
+
+    def increment(self, step: int) -> int:
+        result = yield
+        assert result >= step
+
+
+@interface.implements(Counter)
+class Tally:
+
+    count = 0
+
+    def increment(self, step):
+        self.count += step
+        return self.count
+
+
+class BareTally:
+
+    count = 0
+
+    def increment(self, step):
+        self.count += step
+        return self.count
+
+
+@benchmark('interface.method.enforced')
+def enforced_method():
+    tally = Tally()
+    return lambda: tally.increment(1)
+
+
+@benchmark('interface.method.bare')
+def bare_method():
+    tally = BareTally()
+    return lambda: tally.increment(1)
+
+
+@benchmark('interface.attribute.set')
+def attribute_set():
+    tally = Tally()
+
+    def statement():
+        tally.count = 1
+    return statement
+
+
+@benchmark('interface.attribute.get')
+def attribute_get():
+    tally = Tally()
+    tally.count = 1
+    return lambda: tally.count
+
+
+class Weekday (magic.Enum):
+
+    MONDAY
+    TUESDAY
+    WEDNESDAY
+    THURSDAY
+    FRIDAY
+    SATURDAY
+    SUNDAY
+
+
+@benchmark('magic.enum.iterate')
+def enum_iterate():
+    return lambda: list(Weekday)
+
+
+@benchmark('magic.enum.arithmetic')
+def enum_arithmetic():
+    return lambda: Weekday.MONDAY + 3 - 2
+
+
+@benchmark('magic.enumset.contains')
+def enumset_contains():
+    weekend = Weekday.SATURDAY | Weekday.SUNDAY
+    return lambda: Weekday.SUNDAY in weekend
+
+
+@benchmark('magic.enumset.union')
+def enumset_union():
+    weekend = Weekday.SATURDAY | Weekday.SUNDAY
+    workdays = magic.EnumSet(Weekday, Weekday) - weekend
+    return lambda: weekend | workdays
+
+
+@benchmark('magic.placeholder.attribute')
+def placeholder_attribute():
+    key, item = magic.X.real, 5
+    return lambda: key(item)
+
+
+@benchmark('magic.placeholder.operator')
+def placeholder_operator():
+    key = magic.X * 3
+    return lambda: key(5)
+
+
+@benchmark('magic.placeholder.expression')
+def placeholder_expression():
+    key = (magic.X.real + 1) * magic.X.imag
+    return lambda: key(5)
+
+
+@benchmark('magic.placeholder.compiled')
+def placeholder_compiled():
+    key = magic.compiled((magic.X.real + 1) * magic.X.imag)
+    return lambda: key(5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m nox.bench')
+    parser.add_argument('pattern', nargs='?', default='',
+                        help='only run benchmarks containing this substring')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing repetitions, the best one is kept')
+    parser.add_argument('--save', metavar='FILE',
+                        help='write results as JSON to FILE')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='report regressions against the JSON in FILE')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown counted as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.repeat)
+    for name, seconds in sorted(results.items()):
+        print('{:<36} {:>10.3f} us'.format(name, seconds * 1e6))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print('\nslower than {}:'.format(args.compare))
+        for name, ratio in sorted(regressions.items()):
+            print('{:<36} {:>10.2f} x'.format(name, ratio))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
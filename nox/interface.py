@@ -1,26 +1,87 @@
+import atexit
+import collections
+import contextlib
+import contextvars
 import functools
 import inspect
+import itertools
+import json
+import os
+import sys
 import textwrap
+import threading
+import time
+import weakref
 
 
 cached = functools.lru_cache(maxsize=None)
 
+policy = None
+
+sink = None
+
+reported = 0
+
+profiler = None
+
+methods = weakref.WeakSet()
+
+deferred = contextvars.ContextVar('deferred', default=None)
+
+provided = weakref.WeakKeyDictionary()
+
+cache = None
+
+lazily = threading.RLock()
+
 
 def transform(cls):
-    for interface in cls.__interfaces__:
+    for interface in ancestry(cls):
         for name, value in vars(interface).items():
             if name.startswith('_') or isinstance(value, InterfaceDescriptor):
                 continue
-            original = getattr(cls, name)
+            try:
+                original = inspect.getattr_static(cls, name)
+            except AttributeError:
+                continue
+            if isinstance(original, InterfaceDescriptor):
+                original = original.original
             if inspect.isfunction(value):
+                if not inspect.isfunction(original):
+                    continue
                 descriptor = InterfaceMethod
+            elif inspect.ismemberdescriptor(original):
+                descriptor = InterfaceSlot
             else:
                 descriptor = InterfaceAttribute
-            setattr(cls, name, descriptor(name, original))
+            setattr(cls, name, descriptor(name, original, cls))
     return cls
 
 
-def implements(*interfaces, transformer=transform):
+@contextlib.contextmanager
+def deferred_invariants():
+    if deferred.get() is not None:
+        yield
+        return
+    pending = {}
+    token = deferred.set(pending)
+    try:
+        yield
+    finally:
+        deferred.reset(token)
+    for interface, instance in pending.values():
+        interface.__invariant__(instance)
+
+
+def invariant(interface, instance):
+    pending = deferred.get()
+    if pending is None:
+        interface.__invariant__(instance)
+    else:
+        pending[interface, id(instance)] = interface, instance
+
+
+def implements(*interfaces, transformer=transform, lazy=False):
     def decorator(cls):
         ifaces = interfaces
         try:
@@ -28,15 +89,110 @@ def implements(*interfaces, transformer=transform):
             cls.__interfaces__ += ifaces
         except AttributeError:
             cls.__interfaces__ = ifaces
+        provided.clear()
         if __debug__:
-            for interface in ifaces:
-                interface.__validate__(cls)
+            if lazy:
+                defer(cls, ifaces, transformer)
+                return cls
+            validate(cls, ifaces)
             if transformer is not None:
                 cls = transformer(cls)
         return cls
     return decorator
 
 
+def validate(cls, interfaces):
+    for interface in interfaces:
+        for ancestor in ancestry(interface):
+            key = cache and cache.key(cls, ancestor)
+            if key is None or key not in cache:
+                before = reported
+                ancestor.__validate__(cls)
+                if key is not None and reported == before:
+                    cache.add(key)
+
+
+def defer(cls, interfaces, transformer):
+    original = vars(cls).get('__init__')
+
+    def __init__(self, *args, **kwargs):
+        with lazily:
+            if vars(cls).get('__init__') is __init__:
+                validate(cls, interfaces)
+                if original is None:
+                    del cls.__init__
+                else:
+                    cls.__init__ = original
+                if transformer is not None:
+                    transformer(cls)
+        cls.__init__(self, *args, **kwargs)
+    cls.__init__ = __init__
+
+
+def profile(clock=time.perf_counter):
+    global profiler
+    profiler = Profiler(clock)
+    for method in list(methods):
+        method.profile(profiler)
+    return profiler
+
+
+def unprofile():
+    global profiler
+    profiler = None
+    for method in list(methods):
+        method.profile(None)
+
+
+def cache_validations(path):
+    global cache
+    if cache is not None:
+        atexit.unregister(cache.save)
+        cache.save()
+    cache = ValidationCache(path)
+    atexit.register(cache.save)
+    return cache
+
+
+@cached
+def plan(interface):
+    steps = []
+    for name, value in vars(interface).items():
+        if name.startswith('_'):
+            continue
+        if inspect.isfunction(value):
+            steps.append((name, frozenset(argspec(interface, name).args)))
+        else:
+            steps.append((name, None))
+    return tuple(steps)
+
+
+def provides(cls):
+    try:
+        return provided[cls]
+    except (KeyError, TypeError):
+        pass
+    if not isinstance(cls, type):
+        return frozenset()
+    interfaces = provided[cls] = frozenset(ancestry(cls))
+    return interfaces
+
+
+def ancestry(cls):
+    if isinstance(cls, InterfaceMeta):
+        declared = [cls]
+    else:
+        declared = [interface for base in cls.__mro__
+                    for interface in vars(base).get('__interfaces__', ())]
+    interfaces = []
+    for interface in declared:
+        for ancestor in interface.__mro__:
+            if isinstance(ancestor, InterfaceMeta) and (
+                    ancestor not in interfaces):
+                interfaces.append(ancestor)
+    return tuple(interfaces)
+
+
 class This:
     ...
 
@@ -45,6 +201,227 @@ class InterfaceError (Exception):
     ...
 
 
+class Sample:
+
+    def __init__(self, every):
+        self.every = every
+
+    def gate(self):
+        calls, every = itertools.count(), self.every
+        return lambda: not next(calls) % every
+
+
+class First:
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def gate(self):
+        remaining = itertools.repeat(True, self.calls)
+        return lambda: next(remaining, False)
+
+
+class RateLimit:
+
+    def __init__(self, per_second, clock=time.monotonic):
+        self.per_second = per_second
+        self.clock = clock
+
+    def gate(self):
+        window = [None, 0]
+
+        def gate():
+            second = int(self.clock())
+            if window[0] != second:
+                window[:] = second, 0
+            window[1] += 1
+            return window[1] <= self.per_second
+        return gate
+
+
+class ValidationCache:
+
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+        self.stamps = {}
+        try:
+            with open(path) as file:
+                self.keys = set(json.load(file))
+        except (OSError, ValueError):
+            self.keys = set()
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key):
+        self.keys.add(key)
+        self.dirty = True
+
+    def key(self, cls, interface):
+        stamps = ['{0.__module__}:{0.__qualname__}'.format(obj)
+                  for obj in (cls, interface)]
+        if any('<locals>' in stamp for stamp in stamps):
+            return None
+        modules = {base.__module__ for base in cls.__mro__ + interface.__mro__}
+        modules.discard('builtins')
+        for name in sorted(modules):
+            stamp = self.stamp(name)
+            if stamp is None:
+                return None
+            stamps.append(stamp)
+        return ' '.join(stamps)
+
+    def stamp(self, name):
+        try:
+            return self.stamps[name]
+        except KeyError:
+            pass
+        try:
+            stat = os.stat(sys.modules[name].__file__)
+        except (KeyError, AttributeError, TypeError, OSError):
+            stamp = None
+        else:
+            stamp = '{}:{}:{}'.format(name, stat.st_mtime_ns, stat.st_size)
+        self.stamps[name] = stamp
+        return stamp
+
+    def save(self):
+        if not self.dirty:
+            return
+        temporary = '{}.{}'.format(self.path, os.getpid())
+        with open(temporary, 'w') as file:
+            json.dump(sorted(self.keys), file)
+        os.replace(temporary, self.path)
+        self.dirty = False
+
+
+class Violation:
+
+    __slots__ = 'kind', 'cls', 'interface', 'member', 'offending', 'context'
+
+    templates = {
+        'missing': """expected attribute or method missing
+            {class}.{name} must be present to correctly implement the
+            {interface} interface.
+            """,
+        'method': """attribute expected to be a method
+            {class}.{name}() must be a function (typically an unbound
+            method) to correctly implement the {interface} interface.
+            """,
+        'signature': """method is missing expected arguments
+            {class}.{name}{concrete} must be compatible with the
+            signature {name}{abstract} to correctly implement the
+            {interface} interface, but is missing the arguments
+            {missing}.
+            """,
+        'argument': """method called with argument of unexpected type
+            {class}.{name}() was called with {argument}={value!r}, but
+            the {interface} interface suggests the argument must be an
+            instance of {type!r}.
+            """,
+        'return': """method returned a value of unexpected type
+            {class}.{name}() returned {value!r}, but the {interface}
+            interface suggests the result must be an instance of
+            {type!r}.
+            """,
+        'type': """tried to set an attribute to an unexpected type
+            {class}.{name} must be an instance of {type!r} to correctly
+            implement the {interface} interface, but {value!r} is a
+            {value.__class__}.
+            """,
+        'range': """tried to set an attribute out of expected range
+            {class}.{name} must be in {range!r} to correctly implement
+            the {interface} interface, but {value!r} is not.
+            """,
+    }
+
+    def __init__(self, kind, cls, interface, member, context):
+        self.kind = kind
+        self.cls = cls
+        self.interface = interface
+        self.member = member
+        self.offending = type(context['value']) if 'value' in context else None
+        self.context = context
+
+    def __repr__(self):
+        return '<Violation {} {}.{}>'.format(
+            self.kind, dotted(self.cls), self.member)
+
+    @property
+    def message(self):
+        return assert_msg(self.templates[self.kind], self.cls,
+                          self.interface, self.member, **self.context)
+
+
+class ViolationBuffer:
+
+    def __init__(self, maxlen=1024):
+        self.violations = collections.deque(maxlen=maxlen)
+
+    def __call__(self, violation):
+        self.violations.append(violation)
+
+    def __iter__(self):
+        return iter(list(self.violations))
+
+    def __len__(self):
+        return len(self.violations)
+
+    def drain(self):
+        violations = []
+        while True:
+            try:
+                violations.append(self.violations.popleft())
+            except IndexError:
+                return violations
+
+
+class MethodProfile:
+
+    __slots__ = 'name', 'interfaces', 'calls', 'before', 'method', 'after'
+
+    def __init__(self, name, interfaces):
+        self.name = name
+        self.interfaces = interfaces
+        self.calls = 0
+        self.before = self.method = self.after = 0
+
+    def record(self, start, called, returned, finished):
+        self.calls += 1
+        self.before += called - start
+        self.method += returned - called
+        self.after += finished - returned
+
+
+class Profiler:
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.methods = {}
+
+    def method(self, name, interfaces):
+        try:
+            return self.methods[name]
+        except KeyError:
+            return self.methods.setdefault(
+                name, MethodProfile(name, interfaces))
+
+    def report(self, relative=False):
+        rows = []
+        for method in list(self.methods.values()):
+            overhead = method.before + method.after
+            total = overhead + method.method
+            rows.append(dict(
+                method=method.name, calls=method.calls,
+                interfaces=method.interfaces, before=method.before,
+                original=method.method, after=method.after,
+                overhead=overhead, relative=overhead / total if total else 0,
+            ))
+        key = 'relative' if relative else 'overhead'
+        return sorted(rows, key=lambda row: row[key], reverse=True)
+
+
 class InterfaceMeta (type):
 
     def __prepare__(name, bases):
@@ -55,53 +432,40 @@ class InterfaceMeta (type):
         return super().__new__(cls, name, bases, vars)
 
     def __subclasscheck__(self, subclass):
-        return self in getattr(subclass, '__interfaces__', ())
+        return self in provides(subclass)
 
     def __instancecheck__(self, instance):
-        return self in getattr(instance, '__interfaces__', ())
+        return self in provides(type(instance))
 
 
 class Interface (metaclass=InterfaceMeta):
 
+    __policy__ = None
+
     def __invariant__(self):  # pragma: no cover
         ...
 
     @classmethod
     def __validate__(interface, cls):
-        for name, value in vars(interface).items():
-            if name.startswith('_'):
+        for name, expected in plan(interface):
+            if not hasattr(cls, name):
+                violate('missing', cls, interface, name)
                 continue
 
-            assert hasattr(cls, name), assert_msg(
-                """expected attribute or method missing
-                {class}.{name} must be present to correctly implement the
-                {interface} interface.
-                """, cls, interface, name,
-            )
-
-            if not inspect.isfunction(value):
+            if expected is None:
                 continue
 
-            assert inspect.isfunction(getattr(cls, name)), assert_msg(
-                """attribute expected to be a method
-                {class}.{name}() must be a function (typically an unbound
-                method) to correctly implement the {interface} interface.
-                """, cls, interface, name,
-            )
+            if not inspect.isfunction(getattr(cls, name)):
+                violate('method', cls, interface, name)
+                continue
 
             concrete = argspec(cls, name)
-            abstract = argspec(interface, name)
-            if concrete.varkw is None:
-                assert set(abstract.args) <= set(concrete.args), assert_msg(
-                    """method is missing expected arguments
-                    {class}.{name}{concrete} must be compatible with the
-                    signature {name}{abstract} to correctly implement the
-                    {interface} interface, but is missing the arguments
-                    {missing}.
-                    """, cls, interface, name,
-                    concrete=inspect.formatargspec(*concrete[:3]),
-                    abstract=inspect.formatargspec(*abstract[:3]),
-                    missing=set(abstract.args) - set(concrete.args),
+            if concrete.varkw is None and not expected <= set(concrete.args):
+                violate(
+                    'signature', cls, interface, name,
+                    concrete=inspect.signature(getattr(cls, name)),
+                    abstract=inspect.signature(getattr(interface, name)),
+                    missing=expected - set(concrete.args),
                 )
 
     @classmethod
@@ -114,14 +478,9 @@ class Interface (metaclass=InterfaceMeta):
             if value is This:
                 value = interface
 
-            assert isinstance(args[key], value), assert_msg(
-                """method called with argument of unexpected type
-                {class}.{name}() was called with {argument}={value!r}, but
-                the {interface} interface suggests the argument must be an
-                instance of {type!r}.
-                """, type(instance), interface, name,
-                argument=key, type=value, value=args[key],
-            )
+            if __debug__ and not isinstance(args[key], value):
+                violate('argument', type(instance), interface, name,
+                        argument=key, type=value, value=args[key])
 
         kwargs = {key: value for key, value in args.items()
                   if key in spec.args or key in spec.kwonlyargs}
@@ -134,8 +493,10 @@ class Interface (metaclass=InterfaceMeta):
         next(generator)
         result = yield
 
-        if 'return' in spec.annotations:
-            assert isinstance(result, spec.annotations['return'])
+        expected = spec.annotations.get('return', object)
+        if __debug__ and not isinstance(result, expected):
+            violate('return', type(instance), interface, name,
+                    type=expected, value=result)
 
         try:
             generator.send(result)
@@ -144,89 +505,309 @@ class Interface (metaclass=InterfaceMeta):
         else:
             raise InterfaceError('multiple yields in abstract method')
 
-        interface.__invariant__(instance)
+        invariant(interface, instance)
 
 
 class InterfaceDescriptor:
 
-    def __init__(self, name, original):
+    interfaces = None
+
+    def __init__(self, name, original, owner=None):
         self.name = name
         self.original = original
+        if owner is not None:
+            self.bind(owner)
 
+    def bind(self, owner):
+        self.interfaces = [interface for interface in ancestry(owner)
+                           if self.name in vars(interface)]
 
-class InterfaceAttribute (InterfaceDescriptor):
+    def resolve(self, cls):
+        for owner in cls.__mro__:
+            if vars(owner).get(self.name) is self:
+                return self.bind(owner)
+        return self.bind(cls)
 
-    def __init__(self, name, original):
-        super().__init__(name, original)
-        self.instances = {}
+
+class InterfaceAttribute (InterfaceDescriptor):
 
     def __get__(self, instance, owner):
-        if owner is None:  # pragma: no cover
+        if instance is None:
             return self.original
         try:
-            return self.instances[id(instance)]
-        except KeyError:
+            return instance.__dict__[self.name]
+        except (KeyError, AttributeError):
             return self.original
 
     def __set__(self, instance, value):
         if value != self.original:
-            for interface in instance.__interfaces__:
+            if self.interfaces is None:
+                self.resolve(type(instance))
+            for interface in self.interfaces:
                 self.validate(instance, interface, value)
-        self.instances[id(instance)] = value
+        try:
+            instance.__dict__[self.name] = value
+        except AttributeError:
+            raise AttributeError(
+                '{}.{} is a class-level default; add {!r} to __slots__ to '
+                'set it per instance'.format(
+                    dotted(type(instance)), self.name, self.name),
+            ) from None
 
     def validate(self, instance, interface, value):
         attr = getattr(interface, self.name)
 
         if isinstance(attr, type):
-            assert isinstance(value, attr), assert_msg(
-                """tried to set an attribute to an unexpected type
-                {class}.{name} must be an instance of {type!r} to correctly
-                implement the {interface} interface, but {value!r} is a
-                {value.__class__}.
-                """, type(instance), interface, self.name,
-                type=attr, value=value,
-            )
+            if __debug__ and not isinstance(value, attr):
+                violate('type', type(instance), interface, self.name,
+                        type=attr, value=value)
 
         elif isinstance(attr, range):
-            assert value in attr, assert_msg(
-                """tried to set an attribute out of expected range
-                {class}.{name} must be in {range!r} to correctly implement
-                the {interface} interface, but {value!r} is not.
-                """, type(instance), interface, self.name,
-                range=attr, value=value,
-            )
+            if __debug__ and value not in attr:
+                violate('range', type(instance), interface, self.name,
+                        range=attr, value=value)
+
+
+class InterfaceSlot (InterfaceAttribute):
+
+    def __get__(self, instance, owner):
+        return self.original.__get__(instance, owner)
+
+    def __set__(self, instance, value):
+        if self.interfaces is None:
+            self.resolve(type(instance))
+        for interface in self.interfaces:
+            self.validate(instance, interface, value)
+        self.original.__set__(instance, value)
 
 
 class InterfaceMethod (InterfaceDescriptor):
 
+    function = None
+
+    def bind(self, owner):
+        super().bind(owner)
+        self.label = '{}.{}'.format(dotted(owner), self.name)
+        self.gates = gating(self.interfaces)
+        self.enforced = self.function = enforcing(
+            self.original, self.name, self.interfaces, self.gates)
+        if profiler is not None:
+            self.profile(profiler)
+        methods.add(self)
+
     def __get__(self, instance, owner):
-        if owner is None:  # pragma: no cover
-            return self.original
-        return self.create_wrapper(instance)
-
-    @cached
-    def create_wrapper(self, instance):
-        @functools.wraps(self.original)
-        def wrapper(*args, **kwargs):
-            callargs = inspect.getcallargs(self.original, instance,
-                                           *args, **kwargs)
-            enforcers = [
-                interface.__enforce__(instance, self.name, callargs)
-                for interface in instance.__interfaces__
-                if hasattr(interface, self.name)
-            ]
-            for enforcer in enforcers:
-                next(enforcer)
-            result = self.original(instance, *args, **kwargs)
-            for enforcer in enforcers:
-                try:
-                    enforcer.send(result)
-                except StopIteration:
-                    pass
-                else:
-                    raise InterfaceError('multiple yields in __enforce__')
-            return result
-        return wrapper
+        function = self.function
+        if function is None:
+            self.resolve(owner)
+            function = self.function
+        return function.__get__(instance, owner)
+
+    def profile(self, profiler):
+        if profiler is None:
+            self.function = self.enforced
+            return
+        self.function = enforcing(
+            self.original, self.name, self.interfaces, self.gates,
+            profiler.method(self.label, len(self.interfaces)),
+            profiler.clock,
+        )
+
+
+def gating(interfaces):
+    gates = []
+    for interface in interfaces:
+        gate = interface.__policy__ or policy
+        gates.append(None if gate is None else gate.gate())
+    return gates
+
+
+def enforcing(function, name, interfaces, gates=None, profile=None,
+              clock=None):
+    parameters = inspect.signature(function).parameters.values()
+    names = [parameter.name for parameter in parameters]
+    signature = inspect.Signature([
+        parameter.replace(default=parameter.empty,
+                          annotation=parameter.empty)
+        for parameter in parameters
+    ])
+    call = ', '.join(
+        '*' + parameter.name if parameter.kind is parameter.VAR_POSITIONAL
+        else '**' + parameter.name if parameter.kind is parameter.VAR_KEYWORD
+        else '{0}={0}'.format(parameter.name)
+        if parameter.kind is parameter.KEYWORD_ONLY
+        else parameter.name
+        for parameter in parameters
+    )
+    namespace = {
+        '__original': function,
+        '__callargs': functools.partial(inspect.getcallargs, function),
+        '__finish': finish,
+        '__afinish': afinish,
+        '__invariant': invariant,
+        '__violate': violate,
+        '__isinstance': isinstance,
+        '__type': type,
+        '__next': next,
+        '__clock': clock,
+        '__record': profile and profile.record,
+    }
+    generator = inspect.isasyncgenfunction(function)
+    asynchronous = generator or inspect.iscoroutinefunction(function)
+    if gates is None:
+        gates = gating(interfaces)
+    gated, before, results, after = [], [], [], []
+
+    for n, interface in enumerate(interfaces):
+        context = dict(n=n, name=name, self=names[0], call=call,
+                       asynchronous=asynchronous)
+        namespace['__i{}'.format(n)] = interface
+        checks = contract(interface, names, context, namespace)
+        gate = gates[n]
+        if gate is not None:
+            namespace['__p{}'.format(n)] = gate
+            gated.append(n)
+        for lines, block in zip((before, results, after), checks):
+            if block and gate is not None:
+                lines.append('if __s{}:'.format(n))
+                lines.extend('    ' + line for line in block)
+            else:
+                lines.extend(block)
+
+    if generator:
+        loop = 'async for __result in __original({}):'.format(call)
+        shortcut = [loop, '    yield __result']
+        invoked = [loop] + ['    ' + line for line in results]
+        invoked += ['    yield __result', '__result = None']
+        checks, returning = after, 'return'
+    else:
+        invoke = '{}__original({})'.format(
+            'await ' if asynchronous else '', call)
+        shortcut = invoked = ['__result = ' + invoke]
+        checks, returning = results + after, 'return __result'
+
+    if profile is not None:
+        shortcut = ['__t0 = __clock()'] + shortcut + [
+            '__t2 = __clock()', '__record(__t0, __t0, __t2, __t2)']
+        before = ['__t0 = __clock()'] + before + ['__t1 = __clock()']
+        invoked = invoked + ['__t2 = __clock()']
+        checks = checks + ['__record(__t0, __t1, __t2, __clock())']
+
+    lines = ['{}def {}{}:'.format('async ' if asynchronous else '',
+                                  name, signature)]
+    lines.extend('__s{0} = __p{0}()'.format(n) for n in gated)
+    if gated and len(gated) == len(interfaces):
+        lines.append('if not ({}):'.format(
+            ' or '.join('__s{}'.format(n) for n in gated)))
+        lines.extend('    ' + line for line in shortcut + [returning])
+    lines.extend(before + invoked + checks + [returning])
+    exec('\n    '.join(lines), namespace)
+
+    wrapper = namespace[name]
+    unwrapped = inspect.unwrap(function)
+    wrapper.__defaults__ = unwrapped.__defaults__
+    wrapper.__kwdefaults__ = unwrapped.__kwdefaults__
+    return functools.update_wrapper(wrapper, function)
+
+
+def contract(interface, names, context, namespace):
+    before, results, after = [], [], []
+    n, name = context['n'], context['name']
+
+    if interface.__enforce__.__func__ is not enforce:
+        before.append('__e{n} = __i{n}.__enforce__('
+                      '{self}, {name!r}, __callargs({call}))'
+                      .format(**context))
+        before.append('__next(__e{n})'.format(**context))
+        after.append('__finish(__e{n}, __result, '
+                     '"multiple yields in __enforce__")'
+                     .format(**context))
+        return before, results, after
+
+    spec = argspec(interface, name)
+    for key, value in spec.annotations.items():
+        if value is This:
+            value = interface
+        namespace['__t{}_{}'.format(n, key)] = value
+        if key != 'return' and key in names:
+            before.append('if __debug__ and not __isinstance({key}, '
+                          '__t{n}_{key}):'.format(key=key, **context))
+            before.append('    __violate("argument", __type({self}), __i{n}, '
+                          '{name!r}, argument={key!r}, type=__t{n}_{key}, '
+                          'value={key})'.format(key=key, **context))
+
+    method = namespace['__m{}'.format(n)] = getattr(interface, name)
+    context['kwargs'] = ', '.join('{0}={0}'.format(key)
+                                  for key in spec.args + spec.kwonlyargs
+                                  if key in names)
+    awaitable = (inspect.iscoroutinefunction(method) or
+                 inspect.isasyncgenfunction(method))
+    if awaitable and not context['asynchronous']:
+        raise InterfaceError(
+            'asynchronous {} requires an asynchronous implementation'
+            .format(dotted(interface) + '.' + name))
+
+    required = spec.args[:len(spec.args) - len(spec.defaults or ())]
+    required += [key for key in spec.kwonlyargs
+                 if key not in (spec.kwonlydefaults or {})]
+    if not set(required) <= set(names):
+        return before, results, after
+
+    if inspect.iscoroutinefunction(method):
+        before.append('await __m{n}({kwargs})'.format(**context))
+        return before, results, after
+    if not (awaitable or inspect.isgeneratorfunction(method)):
+        before.append('__m{n}({kwargs})'.format(**context))
+        return before, results, after
+
+    before.append('__e{n} = __m{n}({kwargs})'.format(**context))
+    if awaitable:
+        before.append('await __e{n}.asend(None)'.format(**context))
+        finish = 'await __afinish'
+    else:
+        before.append('__next(__e{n})'.format(**context))
+        finish = '__finish'
+    if 'return' in spec.annotations:
+        results.append('if __debug__ and not __isinstance(__result, '
+                       '__t{n}_return):'.format(**context))
+        results.append('    __violate("return", __type({self}), __i{n}, '
+                       '{name!r}, type=__t{n}_return, value=__result)'
+                       .format(**context))
+    after.append('{finish}(__e{n}, __result, '
+                 '"multiple yields in abstract method")'
+                 .format(finish=finish, **context))
+    if interface.__invariant__ is not Interface.__invariant__:
+        after.append('__invariant(__i{n}, {self})'.format(**context))
+    return before, results, after
+
+
+def finish(enforcer, result, message):
+    try:
+        enforcer.send(result)
+    except StopIteration:
+        pass
+    else:
+        raise InterfaceError(message)
+
+
+async def afinish(enforcer, result, message):
+    try:
+        await enforcer.asend(result)
+    except StopAsyncIteration:
+        pass
+    else:
+        raise InterfaceError(message)
+
+
+def violate(kind, cls, interface, name, **context):
+    global reported
+    reported += 1
+    violation = Violation(kind, cls, interface, name, context)
+    if sink is None:
+        raise AssertionError(violation.message)
+    sink(violation)
+
+
+enforce = Interface.__enforce__.__func__
 
 
 def assert_msg(template, cls, interface, name, **context):
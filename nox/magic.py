@@ -1,6 +1,10 @@
+import array
 import collections
 import functools
+import itertools
 import operator
+import pickle
+import struct
 
 
 class _FieldRecordingDict (dict):
@@ -9,6 +13,8 @@ class _FieldRecordingDict (dict):
         super().__init__(_fields=[])
 
     def __missing__(self, key):
+        if key.startswith('__'):
+            raise KeyError(key)
         if not key.startswith('_'):
             self['_fields'].append(key)
 
@@ -19,42 +25,176 @@ class _NamedTupleMeta (type):
         return _FieldRecordingDict()
 
     def __new__(cls, name, bases, ns):
-        return collections.namedtuple(name, ns['_fields'])
+        record = collections.namedtuple(name, ns['_fields'],
+                                        module=ns.get('__module__'))
+        record.__qualname__ = ns.get('__qualname__', name)
+        if 'Table' not in record._fields:
+            record.Table = functools.partial(Table, record)
+        return record
 
 
 NamedTuple = type.__new__(_NamedTupleMeta, 'NamedTuple', (), {})
 
 
+class Table:
+
+    chunk = 4096
+
+    def __init__(self, record, rows=(), /, **typecodes):
+        unknown = typecodes.keys() - set(record._fields)
+        if unknown:
+            raise TypeError('{} has no fields {}'.format(
+                record.__name__, ', '.join(sorted(unknown))))
+        self.record = record
+        self.columns = tuple(
+            [] if typecodes.get(field, 'O') == 'O'
+            else array.array(typecodes[field])
+            for field in record._fields
+        )
+        self.extend(rows)
+
+    def __repr__(self):
+        return '<{}.Table ({} rows)>'.format(self.record.__name__, len(self))
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(self.record._make,
+                            zip(*(column[index] for column in self.columns))))
+        return tuple.__new__(self.record,
+                             [column[index] for column in self.columns])
+
+    def __iter__(self):
+        return map(self.record._make, zip(*self.columns))
+
+    def column(self, field):
+        return self.columns[self.record._fields.index(field)]
+
+    def append(self, row):
+        self.extend((row,))
+
+    def extend(self, rows):
+        size, width, rows = len(self), len(self.columns), iter(rows)
+        try:
+            for chunk in iter(
+                    lambda: list(itertools.islice(rows, self.chunk)), []):
+                if set(map(len, chunk)) != {width}:
+                    raise ValueError('rows must have {} fields'.format(width))
+                for column, values in zip(self.columns, zip(*chunk)):
+                    column.extend(values)
+        except BaseException:
+            for column in self.columns:
+                del column[size:]
+            raise
+
+
 class _PlaceholderMeta (type):
 
     _OPS = {
-        'add', 'sub', 'mul', 'truediv', 'floordiv',
-        'mod', 'pow', 'lshift', 'rshift',
-        'and', 'xor', 'or',
+        'add': '+', 'sub': '-', 'mul': '*', 'matmul': '@',
+        'truediv': '/', 'floordiv': '//', 'mod': '%', 'pow': '**',
+        'lshift': '<<', 'rshift': '>>', 'and': '&', 'xor': '^', 'or': '|',
+    }
+
+    _COMPARISONS = {
+        'lt': '<', 'le': '<=', 'eq': '==', 'ne': '!=', 'gt': '>', 'ge': '>=',
     }
 
-    def _make_placeholder_op(name):
-        func = getattr(operator, name)
-        return lambda x, y: lambda i: func(i, y)
+    _UNARY = {'neg': '-', 'pos': '+', 'invert': '~'}
+
+    def _make_placeholder_op(symbol, reverse=False):
+        template = '({{}} {} {{}})'.format(symbol)
+        if reverse:
+            return lambda x, y: _Placeholder(template, (y, x))
+        return lambda x, y: _Placeholder(template, (x, y))
+
+    def _make_placeholder_unary(symbol):
+        template = '({}{{}})'.format(symbol)
+        return lambda x: _Placeholder(template, (x,))
 
     def __new__(cls, name, bases, ns):
-        for op in cls._OPS:
-            op = '__{}__'.format(op)
-            ns[op] = cls._make_placeholder_op(op)
+        for op, symbol in cls._OPS.items():
+            ns['__{}__'.format(op)] = cls._make_placeholder_op(symbol)
+            ns['__r{}__'.format(op)] = cls._make_placeholder_op(symbol, True)
+        for op, symbol in cls._COMPARISONS.items():
+            ns['__{}__'.format(op)] = cls._make_placeholder_op(symbol)
+        for op, symbol in cls._UNARY.items():
+            ns['__{}__'.format(op)] = cls._make_placeholder_unary(symbol)
+        ns.setdefault('__hash__', object.__hash__)
         return type.__new__(cls, name, bases, ns)
 
 
+_factories = {}
+
+
 class _Placeholder (metaclass=_PlaceholderMeta):
 
+    __slots__ = '_template', '_operands', '_function'
+
+    __iter__ = None
+
+    def __init__(self, template='__i', operands=()):
+        self._template = template
+        self._operands = operands
+        self._function = None
+
     def __getattr__(self, name):
-        def key(item=...):
-            if item is ...:
-                return operator.methodcaller(name)
-            return getattr(item, name)
-        return key
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+        return _Placeholder('{}.' + name, (self,))
 
     def __getitem__(self, item):
-        return operator.itemgetter(item)
+        return _Placeholder('{}[{}]', (self, item))
+
+    def __abs__(self):
+        return _Placeholder('abs({})', (self,))
+
+    def __call__(self, item=..., *args, **kwargs):
+        if item is ... or args or kwargs:
+            return self._call(() if item is ... else (item,) + args, kwargs)
+        function = self._function
+        if function is None:
+            function = self._compile()
+        return function(item)
+
+    def _call(self, args, kwargs):
+        template = ', '.join(['{}'] * len(args) +
+                             [key + '={}' for key in kwargs])
+        return _Placeholder('{}(' + template + ')',
+                            (self,) + args + tuple(kwargs.values()))
+
+    def _compile(self):
+        constants = []
+        source = self._source(constants)
+        factory = _factories.get(source)
+        if factory is None:
+            parameters = ', '.join('__c{}'.format(n)
+                                   for n in range(len(constants)))
+            factory = eval('lambda {}: lambda __i: {}'.format(
+                parameters, source), {})
+            factory = _factories.setdefault(source, factory)
+        self._function = factory(*constants)
+        return self._function
+
+    def _source(self, constants):
+        operands = []
+        for operand in self._operands:
+            if isinstance(operand, _Placeholder):
+                operands.append(operand._source(constants))
+            else:
+                operands.append('__c{}'.format(len(constants)))
+                constants.append(operand)
+        return self._template.format(*operands)
+
+
+def call(method, *args, **kwargs):
+    return method._call(args, kwargs)
+
+
+def compiled(expression):
+    return expression._function or expression._compile()
 
 
 X = _Placeholder()
@@ -63,6 +203,8 @@ X = _Placeholder()
 @functools.total_ordering
 class _EnumValue:
 
+    __slots__ = 'enum', 'name', 'position'
+
     def __init__(self, enum, name, position):
         self.enum, self.name, self.position = enum, name, position
 
@@ -75,15 +217,21 @@ class _EnumValue:
     def __index__(self):
         return self.position
 
+    def __reduce__(self):
+        return getattr, (self.enum, self.name)
+
     def __add__(self, other):
-        return list(self.enum)[self.position + operator.index(other)]
+        return self.enum._members[self.position + operator.index(other)]
 
     def __sub__(self, other):
-        return list(self.enum)[self.position - operator.index(other)]
+        return self.enum._members[self.position - operator.index(other)]
 
     def __contains__(self, other):
         return self is other
 
+    def __or__(self, other):
+        return EnumSet(self.enum, (self,)) | other
+
 
 class _EnumMeta (type):
 
@@ -91,19 +239,229 @@ class _EnumMeta (type):
         return _FieldRecordingDict()
 
     def __new__(cls, enum, bases, ns):
-        enum = type.__new__(cls, enum, (), {})
-        for position, name in enumerate(ns['_fields']):
-            setattr(enum, name, _EnumValue(enum, name, position))
+        enum = type.__new__(cls, enum, (), {
+            key: ns[key] for key in ('__module__', '__qualname__')
+            if key in ns
+        })
+        enum._members = tuple(_EnumValue(enum, name, position)
+                              for position, name in enumerate(ns['_fields']))
+        enum._names = {value.name: value for value in enum._members}
+        for value in enum._members:
+            setattr(enum, value.name, value)
         return enum
 
     def __iter__(cls):
-        values = (value for value in vars(cls).values()
-                        if isinstance(value, _EnumValue))
-        return iter(sorted(values, key=X.position))
+        return iter(cls._members)
+
+    def __len__(cls):
+        return len(cls._members)
+
+    def __getitem__(cls, name):
+        return cls._names[name]
+
+    def __call__(cls, position):
+        return cls._members[operator.index(position)]
 
     def __repr__(cls):
         return '<{} ({})>'.format(cls.__name__,
                                   ', '.join(value.name for value in cls))
 
 
-Enum = type.__new__(_EnumMeta, 'Enum', (), {})
+Enum = type.__new__(_EnumMeta, 'Enum', (), {'_members': (), '_names': {}})
+
+
+class EnumSet:
+
+    __slots__ = 'enum', 'bits'
+
+    def __init__(self, enum, members=(), bits=0):
+        for member in members:
+            if member.enum is not enum:
+                raise TypeError('{!r} is not a member of {}'.format(
+                    member, enum.__name__))
+            bits |= 1 << member.position
+        if bits < 0 or bits >> len(enum._members):
+            raise ValueError('bits {:#x} out of range for {}'.format(
+                bits, enum.__name__))
+        self.enum, self.bits = enum, bits
+
+    def __repr__(self):
+        return 'EnumSet({}, [{}])'.format(
+            self.enum.__name__, ', '.join(map(repr, self)))
+
+    def __contains__(self, member):
+        return (isinstance(member, _EnumValue) and member.enum is self.enum
+                and bool(self.bits >> member.position & 1))
+
+    def __iter__(self):
+        bits, members = self.bits, self.enum._members
+        while bits:
+            lowest = bits & -bits
+            yield members[lowest.bit_length() - 1]
+            bits ^= lowest
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return bool(self.bits)
+
+    def __int__(self):
+        return self.bits
+
+    def __hash__(self):
+        return hash((self.enum, self.bits))
+
+    def __eq__(self, other):
+        if not isinstance(other, EnumSet):
+            return NotImplemented
+        return self.enum is other.enum and self.bits == other.bits
+
+    def __le__(self, other):
+        bits = self._bits(other)
+        if bits is None:
+            return NotImplemented
+        return self.bits & ~bits == 0
+
+    def __ge__(self, other):
+        bits = self._bits(other)
+        if bits is None:
+            return NotImplemented
+        return bits & ~self.bits == 0
+
+    def __or__(self, other):
+        return self._combine(other, operator.or_)
+
+    def __and__(self, other):
+        return self._combine(other, operator.and_)
+
+    def __sub__(self, other):
+        return self._combine(other, lambda a, b: a & ~b)
+
+    def __xor__(self, other):
+        return self._combine(other, operator.xor)
+
+    __ror__, __rand__, __rxor__ = __or__, __and__, __xor__
+
+    def _bits(self, other):
+        if isinstance(other, EnumSet) and other.enum is self.enum:
+            return other.bits
+        if isinstance(other, _EnumValue) and other.enum is self.enum:
+            return 1 << other.position
+        return None
+
+    def _combine(self, other, op):
+        bits = self._bits(other)
+        if bits is None:
+            return NotImplemented
+        return EnumSet(self.enum, bits=op(self.bits, bits))
+
+    @staticmethod
+    def words(enum):
+        return max(1, (len(enum) + 63) // 64)
+
+    @classmethod
+    def pack(cls, enum, sets):
+        words, mask = cls.words(enum), (1 << 64) - 1
+        packed = array.array('Q')
+        for members in sets:
+            if members.enum is not enum:
+                raise TypeError('{!r} is not a set of {}'.format(
+                    members, enum.__name__))
+            if words == 1:
+                packed.append(members.bits)
+                continue
+            packed.extend((members.bits >> 64 * word) & mask
+                          for word in range(words))
+        return packed
+
+    @classmethod
+    def unpack(cls, enum, data):
+        words = cls.words(enum)
+        if not (isinstance(data, array.array) and data.typecode == 'Q'):
+            packed = array.array('Q')
+            try:
+                view = memoryview(data)
+            except TypeError:
+                view = None
+            if view is not None and view.itemsize == 8 and (
+                    view.format.lstrip('@=<') in ('Q', 'L')):
+                packed.frombytes(view.cast('B'))
+            else:
+                packed.extend(map(int, data))
+            data = packed
+        if len(data) % words:
+            raise ValueError('expected a multiple of {} words'.format(words))
+        sets = []
+        for start in range(0, len(data), words):
+            bits = 0
+            for word in range(words):
+                bits |= data[start + word] << 64 * word
+            sets.append(cls(enum, bits=bits))
+        return sets
+
+
+class Codec:
+
+    chunk = 4096
+
+    def __init__(self, record, **layout):
+        self.record = record
+        fields = record._fields
+        if not set(fields) <= set(layout):
+            self.struct = None
+            self.pack = tuple
+            self.make = record._make
+            return
+
+        codes, pack, make = ['<'], [], []
+        namespace = {'__new': tuple.__new__, '__record': record}
+        for n, field in enumerate(fields):
+            kind = layout[field]
+            if isinstance(kind, _EnumMeta):
+                namespace['__e{}'.format(n)] = kind._members
+                codes.append('B' if len(kind) <= 1 << 8 else
+                             'H' if len(kind) <= 1 << 16 else 'I')
+                pack.append('__r[{}].position'.format(n))
+                make.append('__e{0}[__v[{0}]]'.format(n))
+            else:
+                codes.append(kind)
+                pack.append('__r[{}]'.format(n))
+                make.append('__v[{}]'.format(n))
+        self.struct = struct.Struct(''.join(codes))
+        namespace['__pack'] = self.struct.pack
+        self.pack = eval('lambda __r: __pack({})'.format(', '.join(pack)),
+                         namespace)
+        self.make = eval('lambda __v: __new(__record, ({},))'.format(
+            ', '.join(make)), namespace)
+
+    def encode(self, records):
+        if self.struct is None:
+            return pickle.dumps(list(map(self.pack, records)),
+                                pickle.HIGHEST_PROTOCOL)
+        return b''.join(map(self.pack, records))
+
+    def decode(self, data):
+        if self.struct is None:
+            return map(self.make, pickle.loads(data))
+        return map(self.make, self.struct.iter_unpack(data))
+
+    def dump(self, records, file):
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, self.chunk))
+            if not chunk:
+                return
+            data = self.encode(chunk)
+            if self.struct is None:
+                file.write(struct.pack('<I', len(data)))
+            file.write(data)
+
+    def load(self, file):
+        if self.struct is not None:
+            size = self.struct.size * self.chunk
+            for data in iter(lambda: file.read(size), b''):
+                yield from self.decode(data)
+            return
+        for header in iter(lambda: file.read(4), b''):
+            yield from self.decode(file.read(*struct.unpack('<I', header)))
@@ -1,4 +1,7 @@
 import io
+import sys
+import threading
+import types
 import pytest
 
 from collections import Sized, Mapping
@@ -104,3 +107,198 @@ def test_recursion(adapt):
     adapt[Number:range] = range
     adapt[range:list] = list
     assert adapt('hello', list) == [0, 1, 2, 3, 4]
+
+
+def test_resolution_cache(adapt):
+    adapt += format_number
+    adapt[Sized:Number] = len
+    factory = adapt[range:str]
+    assert adapt[range:str] is factory
+    adapt[range:str] = repr
+    assert adapt[range:str] is repr
+
+
+def test_shortest_chain(adapt):
+    calls = []
+    def hop(factory):
+        return lambda x: calls.append(factory) or factory(x)
+    adapt[str:list] = hop(list)
+    adapt[list:tuple] = hop(tuple)
+    adapt[tuple:frozenset] = hop(frozenset)
+    adapt[str:tuple] = hop(tuple)
+    assert adapt('ab', frozenset) == frozenset('ab')
+    assert calls == [tuple, frozenset]
+
+
+def test_weighted_chain(adapt):
+    calls = []
+    def hop(factory):
+        return lambda x: calls.append(factory) or factory(x)
+    adapt[str:list] = hop(list)
+    adapt[list:tuple] = hop(tuple)
+    adapt[tuple:frozenset] = hop(frozenset)
+    adapt[str:tuple:5] = hop(tuple)
+    assert adapt('ab', frozenset) == frozenset('ab')
+    assert calls == [list, tuple, frozenset]
+
+
+def test_weighted_exact_match(adapt):
+    adapt[int:float] = float
+    adapt[float:str] = repr
+    adapt[int:str:10] = str
+    assert adapt(5, str) == '5.0'
+    adapt[int:str:2] = str
+    assert adapt(5, str) == '5'
+
+
+def test_cyclic_registrations(adapt):
+    adapt[Sized:Number] = len
+    adapt[Number:range] = range
+    adapt[range:list] = list
+    with pytest.raises(adapter.AdaptationError):
+        adapt(object(), Number)
+    assert adapt('abc', list) == [0, 1, 2]
+
+
+def test_index(adapt):
+    adapt += format_number
+    adapt[Sized:Number] = len
+    index = adapt.index
+    assert isinstance(index, adapter.Index)
+    assert index.adapted[Number] == ((Number, str),)
+    assert index.provided[Number] == ((Sized, Number),)
+
+
+def test_explain(adapt):
+    adapt += format_number
+    adapt[Sized:Number] = len
+    assert adapt.explain(Number, str) == ((Number, str),)
+    assert adapt.explain(range, str) == ((Sized, Number), (Number, str))
+    with pytest.raises(adapter.AdaptationError):
+        adapt.explain(str, range)
+
+
+def test_lookup(adapt):
+    assert adapt.lookup(int, str) is None
+    assert adapt.lookup(int, str, repr) is repr
+    adapt += format_number
+    assert adapt.lookup(int, str) is format_number
+
+
+def test_adapt_many(adapt):
+    adapt += format_number
+    adapt[Sized:Number] = len
+    adapted = adapt.adapt_many([1000, 'hi', range(5), 'yo', 2.5], str)
+    assert list(adapted) == ['1,000', 'hi', '5', 'yo', '2.5']
+    adapted = adapt.adapt_many(['hi', None], Number, alternate=0)
+    assert list(adapted) == [2, 0]
+    with pytest.raises(adapter.AdaptationError):
+        list(adapt.adapt_many(['hi', None], Number))
+
+
+def test_adapt_grouped(adapt):
+    adapt += format_number
+    adapted = adapt.adapt_grouped([1000, 'hi', 2000, None], str, '?')
+    assert adapted == {int: ['1,000', '2,000'], str: ['hi'], type(None): ['?']}
+
+
+def test_chain(adapt):
+    adapt += format_number
+    adapt[Sized:Number] = len
+    chain = adapt[range:str]
+    assert chain is adapt[range:str]
+    assert chain.steps == (len, format_number)
+    assert chain.path == ((Sized, Number), (Number, str))
+    assert chain(range(1337)) == '1,337'
+
+
+def test_concurrent_registration(adapt):
+    adapt += format_number
+    errors = []
+
+    def read():
+        try:
+            for _ in range(2000):
+                assert adapt(5000, str) == '5,000'
+                adapt.lookup(bytes, Number)
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for n in range(200):
+        adapt[type('T{}'.format(n), (), {}):Number] = len
+    for reader in readers:
+        reader.join()
+    assert not errors
+
+
+def test_freeze(adapt):
+    adapt += format_number
+    adapt[Sized:Number] = len
+    frozen = adapt.freeze()
+    assert isinstance(frozen, adapter.FrozenRegistry)
+    assert frozen(range(1337), str) == '1,337'
+    with pytest.raises(TypeError):
+        frozen[str:list] = list
+    adapt[str:list] = list
+    assert adapt('ab', list) == ['a', 'b']
+    assert frozen('ab', list, None) is None
+
+
+def test_lazy_registration(adapt):
+    adapt['numbers:Number':str] = 'test_adapter:format_number'
+    adapt[str:list] = 'nox_missing_module:factory'
+    adapt += 'test_adapter:StringIO'
+    assert adapt(5000, str) == '5,000'
+    assert adapt[Number:str] is format_number
+    assert adapt('hello', io.IOBase).read() == 'hello'
+    with pytest.raises(ImportError):
+        adapt('hello', list)
+
+
+def test_failed_lazy_registration(adapt):
+    adapt[int:str] = str
+    adapt['nox_missing_module:T':list] = 'nox_missing_module:factory'
+    adapt += 'nox_missing_module:other'
+    assert adapt(5, str) == '5'
+    assert adapt(5.0, str, 'alt') == 'alt'
+    adapt[float:str] = repr
+    assert adapt(5.0, str) == '5.0'
+    assert [factory for factory, error in adapt.failures] == [
+        'nox_missing_module:factory', 'nox_missing_module:other']
+    assert all(isinstance(error, ImportError)
+               for factory, error in adapt.failures)
+
+
+def test_failed_lazy_registration_retried(adapt, monkeypatch):
+    adapt['nox_late_module:Late':str] = repr
+    assert adapt(5, str, None) is None
+    module = types.ModuleType('nox_late_module')
+    module.Late = type('Late', (), {})
+    monkeypatch.setitem(sys.modules, 'nox_late_module', module)
+    assert adapt(module.Late(), str).startswith('<')
+    assert not adapt.failures
+
+
+def test_instrumentation(adapt):
+    events = []
+    adapt += format_number
+    adapt[Sized:Number] = len
+    statistics = adapt.instrument(lambda *event: events.append(event[:2]))
+    adapt(range(5), str)
+    adapt(range(5), str)
+    adapt('hi', str)
+    adapt(None, str, None)
+    snapshot = statistics.snapshot()
+    assert snapshot['hits'] == 2
+    assert snapshot['misses'] == 2
+    assert snapshot['paths'][range, str]['calls'] == 2
+    assert snapshot['paths'][range, str]['length'] == 2
+    assert snapshot['paths'][str, str]['length'] == 0
+    assert snapshot['paths'][type(None), str]['errors'] == 1
+    assert events[-1] == ((type(None), str), None)
+    adapt.uninstrument()
+    adapt(range(5), str)
+    assert statistics.snapshot()['paths'][range, str]['calls'] == 2
@@ -0,0 +1,20 @@
+from nox import bench
+
+
+def test_registered_benchmarks():
+    for name, setup in bench.BENCHMARKS.items():
+        setup()()
+
+
+def test_run():
+    results = bench.run('magic.placeholder.operator', repeat=1)
+    assert list(results) == ['magic.placeholder.operator']
+    assert results['magic.placeholder.operator'] > 0
+
+
+def test_compare():
+    baseline = {'fast': 1.0, 'slow': 1.0, 'gone': 1.0}
+    results = {'fast': 1.05, 'slow': 1.5, 'new': 1.0}
+    assert bench.compare(baseline, results) == {'slow': 1.5}
+    assert bench.compare(baseline, results, threshold=0.01) == {
+        'fast': 1.05, 'slow': 1.5}
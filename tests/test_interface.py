@@ -1,6 +1,14 @@
+import asyncio
+import collections
+import functools
+import gc
+import weakref
+
 import pytest
 
-from nox.interface import Interface, implements
+from nox import interface
+from nox.interface import Interface, InterfaceError, implements
+from nox.interface import Sample, First, RateLimit
 
 
 ifdebug = pytest.mark.xfail('not __debug__')
@@ -119,3 +127,712 @@ def test_correct_call():
     larry = Person()
     larry.first_name = 'Larry'
     assert guido.greet(larry) == 'Hello, Larry!'
+
+
+class Scaler (Interface):
+
+    def scale(self, value: int, *, factor: int) -> int:
+        ...
+
+
+@implements(Scaler)
+class Doubler:
+
+    def scale(self, value, *extra, factor=2):
+        return value * factor
+
+
+def test_wrapper_signature():
+    doubler = Doubler()
+    assert doubler.scale(2) == 4
+    assert doubler.scale(2, factor=3) == 6
+    assert doubler.scale.__name__ == 'scale'
+    assert Doubler.scale.__kwdefaults__ == {'factor': 2}
+
+
+@ifdebug
+def test_wrapper_checks_keyword_only():
+    with pytest.raises(AssertionError) as e:
+        Doubler().scale(2, factor='3')
+    assert 'method called with argument of unexpected type' in str(e.value)
+
+
+@ifdebug
+def test_custom_enforce():
+    calls = []
+
+    class Logged (Interface):
+
+        @classmethod
+        def __enforce__(interface, instance, name, args):
+            calls.append((name, args['value']))
+            calls.append((yield))
+
+        def scale(self, value): ...
+
+    @implements(Logged)
+    class Tripler:
+
+        def scale(self, value):
+            return value * 3
+
+    assert Tripler().scale(2) == 6
+    assert calls == [('scale', 2), 6]
+
+
+def test_instances_are_collected():
+    guido = Person()
+    guido.first_name = 'Guido'
+    larry = Person()
+    larry.first_name = 'Larry'
+    assert guido.greet(larry) == 'Hello, Larry!'
+    ref = weakref.ref(guido)
+    del guido
+    gc.collect()
+    assert ref() is None
+
+
+def test_attributes_stored_on_instance():
+    guido = Person()
+    guido.first_name = 'Guido'
+    assert vars(guido) == {'first_name': 'Guido'}
+    assert Person().first_name is None
+    assert Person.first_name is None
+
+
+@implements(People)
+class SlottedPerson:
+
+    __slots__ = 'first_name', 'last_name', 'age'
+
+    def greet(self, person):
+        return 'Hello, {.first_name}!'.format(person)
+
+
+def test_slotted_attributes():
+    guido = SlottedPerson()
+    guido.first_name = 'Guido'
+    assert guido.first_name == 'Guido'
+    assert not hasattr(guido, '__dict__')
+    with pytest.raises(AttributeError):
+        guido.last_name
+
+
+@ifdebug
+def test_slotted_class_defaults():
+    @implements(People)
+    class Partly:
+        __slots__ = 'first_name',
+        last_name = None
+        age = 30
+        def greet(self, person): ...
+    partly = Partly()
+    assert partly.age == 30
+    assert partly.last_name is None
+    partly.first_name = 'Guido'
+    with pytest.raises(AttributeError) as e:
+        partly.age = 40
+    assert "add 'age' to __slots__" in str(e.value)
+    assert partly.age == 30
+
+
+@ifdebug
+def test_slotted_typed_descriptors():
+    guido = SlottedPerson()
+    with pytest.raises(AssertionError) as e:
+        guido.first_name = 123
+    assert 'tried to set an attribute to an unexpected type' in str(e.value)
+
+
+class Sampled (Interface):
+
+    __policy__ = Sample(3)
+
+    def check(self, value: int) -> int:
+        ...
+
+
+@implements(Sampled)
+class Checked:
+
+    def check(self, value):
+        return value
+
+
+@ifdebug
+def test_sampled_enforcement():
+    checked = Checked()
+    with pytest.raises(AssertionError):
+        checked.check('first call is checked')
+    assert checked.check('second') == 'second'
+    assert checked.check('third') == 'third'
+    with pytest.raises(AssertionError):
+        checked.check('fourth call is checked again')
+
+
+def test_policies():
+    gate = First(2).gate()
+    assert [gate() for _ in range(4)] == [True, True, False, False]
+    now = [0.0]
+    gate = RateLimit(2, clock=lambda: now[0]).gate()
+    assert [gate() for _ in range(3)] == [True, True, False]
+    now[0] = 1.5
+    assert [gate() for _ in range(3)] == [True, True, False]
+    gate = Sample(2).gate()
+    assert [gate() for _ in range(4)] == [True, False, True, False]
+
+
+@ifdebug
+def test_global_policy():
+    interface.policy = First(1)
+    try:
+        @implements(People)
+        class Sloppy (Person):
+            ...
+    finally:
+        interface.policy = None
+    sloppy = Sloppy()
+    with pytest.raises(AssertionError):
+        sloppy.greet('World')
+    assert sloppy.greet(Person()) == 'Hello, None!'
+
+
+class Fetcher (Interface):
+
+    fetched = range(0, 10)
+
+    def __invariant__(self):
+        assert self.fetched < 3, 'fetched too much'
+
+    def fetch(self, url: str) -> bytes:
+        result = yield
+        assert result.startswith(b'<'), 'not markup'
+
+    async def stream(self, url: str) -> bytes:
+        assert url.startswith('http'), 'not a web url'
+        result = yield
+        assert result is None
+
+    async def close(self):
+        assert self.fetched, 'nothing fetched yet'
+
+
+@implements(Fetcher)
+class FakeFetcher:
+
+    fetched = 0
+
+    async def fetch(self, url):
+        await asyncio.sleep(0)
+        self.fetched += 1
+        return url.encode()
+
+    async def stream(self, url):
+        for chunk in url.split('/'):
+            yield chunk.encode()
+
+    async def close(self):
+        ...
+
+
+def test_async_methods():
+    fetcher = FakeFetcher()
+
+    async def scenario():
+        assert await fetcher.fetch('<html>') == b'<html>'
+        chunks = [chunk async for chunk in fetcher.stream('http://nox')]
+        assert chunks == [b'http:', b'', b'nox']
+        await fetcher.close()
+
+    asyncio.run(scenario())
+
+
+@ifdebug
+def test_async_postconditions_see_awaited_result():
+    fetcher = FakeFetcher()
+    with pytest.raises(AssertionError) as e:
+        asyncio.run(fetcher.fetch('html'))
+    assert 'not markup' in str(e.value)
+    fetcher.fetched = 2
+    with pytest.raises(AssertionError) as e:
+        asyncio.run(fetcher.fetch('<html>'))
+    assert 'fetched too much' in str(e.value)
+
+
+@ifdebug
+def test_async_preconditions():
+    fetcher = FakeFetcher()
+
+    async def stream(url):
+        return [chunk async for chunk in fetcher.stream(url)]
+
+    with pytest.raises(AssertionError) as e:
+        asyncio.run(stream('ftp://nox'))
+    assert 'not a web url' in str(e.value)
+    with pytest.raises(AssertionError) as e:
+        asyncio.run(fetcher.close())
+    assert 'nothing fetched yet' in str(e.value)
+
+
+@ifdebug
+def test_async_requires_async_implementation():
+    with pytest.raises(InterfaceError):
+        @implements(Fetcher)
+        class SyncFetcher (FakeFetcher):
+            def close(self):
+                ...
+
+
+class Account (Interface):
+
+    def __invariant__(self):
+        self.checks += 1
+        assert self.balance >= 0, 'overdrawn'
+
+    def deposit(self, amount: int):
+        yield
+
+
+@implements(Account)
+class Wallet:
+
+    balance = checks = 0
+
+    def deposit(self, amount):
+        self.balance += amount
+
+
+@ifdebug
+def test_deferred_invariants():
+    wallet = Wallet()
+    with interface.deferred_invariants():
+        wallet.deposit(-5)
+        with interface.deferred_invariants():
+            wallet.deposit(3)
+        wallet.deposit(2)
+        assert wallet.checks == 0
+    assert wallet.checks == 1
+
+    with pytest.raises(AssertionError) as e:
+        with interface.deferred_invariants():
+            wallet.deposit(-5)
+            wallet.deposit(4)
+    assert 'overdrawn' in str(e.value)
+    assert wallet.checks == 2
+
+
+class Employee (People):
+
+    salary = range(0, 10 ** 6)
+
+
+@implements(Employee)
+class Clerk:
+
+    first_name = last_name = age = salary = None
+
+    def greet(self, person):
+        return 'Good day.'
+
+
+def test_interface_inheritance():
+    assert issubclass(Employee, People)
+    assert not issubclass(People, Employee)
+    assert issubclass(Clerk, Employee)
+    assert isinstance(Clerk(), People)
+    assert not isinstance(Person(), Employee)
+
+
+def test_inherited_implementation():
+    class Child (Person):
+        ...
+    assert isinstance(Child(), People)
+
+
+def test_late_implementation():
+    class Late:
+        first_name = last_name = age = None
+        def greet(self, person): ...
+    assert not isinstance(Late(), People)
+    implements(People)(Late)
+    assert isinstance(Late(), People)
+
+
+@ifdebug
+def test_inherited_interface_enforcement():
+    clerk = Clerk()
+    with pytest.raises(AssertionError) as e:
+        clerk.salary = -1
+    assert 'tried to set an attribute out of expected range' in str(e.value)
+    with pytest.raises(AssertionError) as e:
+        clerk.first_name = 123
+    assert 'tried to set an attribute to an unexpected type' in str(e.value)
+    with pytest.raises(AssertionError) as e:
+        @implements(Employee)
+        class Intern:
+            salary = None
+    assert 'expected attribute or method missing' in str(e.value)
+
+
+def test_validation_plan():
+    steps = dict(interface.plan(People))
+    assert steps['first_name'] is None
+    assert steps['greet'] == {'self', 'person'}
+    assert interface.plan(People) is interface.plan(People)
+
+
+@ifdebug
+def test_lazy_validation():
+    @implements(People, lazy=True)
+    class Draft:
+        first_name = None
+    assert issubclass(Draft, People)
+    for attempt in range(2):
+        with pytest.raises(AssertionError) as e:
+            Draft()
+        assert 'expected attribute or method missing' in str(e.value)
+
+    @implements(People, lazy=True)
+    class Sketch:
+        first_name = last_name = age = None
+        def __init__(self, age):
+            self.age = age
+        def greet(self, person):
+            return 'Hi.'
+    assert Sketch.__dict__['greet'].__name__ == 'greet'
+    assert Sketch(30).age == 30
+    assert vars(Sketch)['__init__'].__code__.co_varnames[1] == 'age'
+    assert isinstance(vars(Sketch)['greet'], interface.InterfaceMethod)
+    with pytest.raises(AssertionError):
+        Sketch(200)
+
+
+validated = []
+
+
+class Audited (People):
+
+    @classmethod
+    def __validate__(interface, cls):
+        validated.append(cls)
+        super().__validate__(cls)
+
+
+@implements(Audited)
+class AuditedPerson:
+
+    first_name = last_name = age = None
+
+    def greet(self, person):
+        ...
+
+
+@ifdebug
+def test_validation_cache(tmpdir, monkeypatch):
+    path = str(tmpdir.join('validated.json'))
+    del validated[:]
+
+    monkeypatch.setattr(interface, 'cache', interface.ValidationCache(path))
+    interface.validate(AuditedPerson, (Audited,))
+    assert validated == [AuditedPerson]
+    interface.cache.save()
+
+    monkeypatch.setattr(interface, 'cache', interface.ValidationCache(path))
+    interface.validate(AuditedPerson, (Audited,))
+    assert validated == [AuditedPerson]
+
+
+@ifdebug
+def test_validation_cache_ignores_local_classes(tmpdir, monkeypatch):
+    monkeypatch.setattr(interface, 'cache', interface.ValidationCache(
+        str(tmpdir.join('validated.json'))))
+
+    def make(good):
+        @implements(People)
+        class Made:
+            first_name = last_name = age = None
+            if good:
+                def greet(self, person): ...
+        return Made
+
+    make(True)
+    assert interface.cache.key(make(True), People) is None
+    with pytest.raises(AssertionError):
+        make(False)
+
+
+def test_cache_validations_registers_once(tmpdir, monkeypatch):
+    registered = []
+    monkeypatch.setattr(interface.atexit, 'register', registered.append)
+    monkeypatch.setattr(interface.atexit, 'unregister', registered.remove)
+    monkeypatch.setattr(interface, 'cache', None)
+    interface.cache_validations(str(tmpdir.join('one.json')))
+    interface.cache_validations(str(tmpdir.join('two.json')))
+    assert registered == [interface.cache.save]
+
+
+@ifdebug
+def test_validation_cache_skips_violations(tmpdir, monkeypatch):
+    monkeypatch.setattr(interface, 'cache', interface.ValidationCache(
+        str(tmpdir.join('validated.json'))))
+    monkeypatch.setattr(interface, 'sink', interface.ViolationBuffer())
+
+    def define():
+        @implements(People)
+        class Broken:
+            first_name = None
+        return Broken
+
+    define()
+    assert not [key for key in interface.cache.keys
+                if ' test_interface:People ' in key]
+    monkeypatch.setattr(interface, 'sink', None)
+    with pytest.raises(AssertionError):
+        define()
+
+
+class Ordered (collections.OrderedDict):
+    ...
+
+
+def test_validation_cache_key_covers_bases(tmpdir):
+    cache = interface.ValidationCache(str(tmpdir.join('validated.json')))
+    key = cache.key(Ordered, People)
+    assert 'collections:' in key
+    assert 'nox.interface:' in key
+
+
+@ifdebug
+def test_violation_buffer(monkeypatch):
+    class Stranger:
+        first_name = 'Ann'
+
+    buffer = interface.ViolationBuffer(maxlen=2)
+    monkeypatch.setattr(interface, 'sink', buffer)
+    person = Person()
+    person.first_name = 123
+    person.age = 200
+    assert person.greet(Stranger()) == 'Hello, Ann!'
+    assert len(buffer) == 2
+    assert [violation.kind for violation in buffer] == ['range', 'argument']
+
+    @implements(People)
+    class Partial:
+        first_name = None
+    violations = buffer.drain()
+    assert not len(buffer)
+    assert [violation.member for violation in violations] == ['age', 'greet']
+    assert violations[0].cls is Partial
+    assert violations[0].interface is People
+    assert 'expected attribute or method missing' in violations[0].message
+
+
+@ifdebug
+def test_violation_details(monkeypatch):
+    violations = []
+    monkeypatch.setattr(interface, 'sink', violations.append)
+    Person().first_name = 123
+    violation, = violations
+    assert violation.kind == 'type'
+    assert violation.member == 'first_name'
+    assert violation.offending is int
+    assert 'tried to set an attribute to an unexpected type' in (
+        violation.message)
+    assert repr(violation) == '<Violation type {}.first_name>'.format(
+        interface.dotted(Person))
+
+
+@ifdebug
+def test_profiling():
+    class Ticks:
+        def __init__(self):
+            self.now = 0
+
+        def __call__(self):
+            self.now += 1
+            return self.now
+
+    person, other = Person(), Person()
+    person.first_name, other.first_name = 'Ann', 'Bob'
+    bare = vars(Person)['greet'].function
+    profiler = interface.profile(Ticks())
+    try:
+        assert vars(Person)['greet'].function is not bare
+        for _ in range(3):
+            assert other.greet(person) == 'Hello, Ann!'
+        report = {row['method']: row for row in profiler.report()}
+        row = report[interface.dotted(Person) + '.greet']
+        assert row['calls'] == 3
+        assert row['interfaces'] == 1
+        assert row['before'] == row['original'] == row['after'] == 3
+        assert row['overhead'] == 6
+        assert row['relative'] == 6 / 9
+        assert profiler.report(relative=True)[0]['relative'] >= 6 / 9
+    finally:
+        interface.unprofile()
+    assert vars(Person)['greet'].function is bare
+
+
+class Tagger (Interface):
+
+    def tag(self, isinstance: str, type: int, next: str) -> str:
+        result = yield
+        assert result
+
+
+@implements(Tagger)
+class Labeller:
+
+    def tag(self, isinstance, type, next):
+        return isinstance * type + next
+
+
+@ifdebug
+def test_parameters_shadowing_builtins():
+    assert Labeller().tag('a', 2, '!') == 'aa!'
+    with pytest.raises(AssertionError) as e:
+        Labeller().tag('a', '2', '!')
+    assert 'method called with argument of unexpected type' in str(e.value)
+
+
+def test_checks_leave_classes_untouched():
+    class Sealed (type):
+        def __setattr__(cls, name, value):
+            raise AttributeError(name)
+
+    class Foreign (metaclass=Sealed):
+        ...
+
+    assert not isinstance(Foreign(), People)
+    assert not issubclass(Foreign, People)
+    assert not hasattr(Foreign, '__provides__')
+    assert '__provides__' not in vars(Person)
+    assert not issubclass(1, People)
+    assert not isinstance(5, People)
+
+
+@ifdebug
+def test_lazy_validation_reentrant():
+    @implements(People, lazy=True)
+    class Inner:
+        first_name = last_name = age = None
+        def greet(self, person): ...
+
+    class Checked (People):
+        @classmethod
+        def __validate__(interface, cls):
+            Inner()
+            super().__validate__(cls)
+
+    @implements(Checked, lazy=True)
+    class Outer:
+        first_name = last_name = age = None
+        def greet(self, person): ...
+
+    assert isinstance(Outer(), Checked)
+    assert isinstance(vars(Inner)['greet'], interface.InterfaceMethod)
+
+
+class Waver (Interface):
+
+    def wave(self, a, b):
+        result = yield
+        assert result
+
+
+@ifdebug
+def test_violations_do_not_break_classes(monkeypatch):
+    buffer = interface.ViolationBuffer()
+    monkeypatch.setattr(interface, 'sink', buffer)
+
+    @implements(People)
+    class Greeter:
+        first_name = last_name = age = None
+        greet = 'hello'
+
+    @implements(Waver)
+    class Stub:
+        def wave(self, a):
+            return a
+
+    assert Greeter.greet == 'hello'
+    assert Stub().wave(1) == 1
+    assert [violation.kind for violation in buffer] == ['method', 'signature']
+
+
+def logged(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        return method(*args, **kwargs)
+    return wrapper
+
+
+@implements(People)
+class PoliteGreeter:
+
+    first_name = last_name = age = None
+
+    @logged
+    def greet(self, person, greeting='Hello'):
+        return '{}, {.first_name}!'.format(greeting, person)
+
+
+def test_decorated_implementation():
+    guido, other = PoliteGreeter(), PoliteGreeter()
+    guido.first_name = other.first_name = 'Guido'
+    assert other.greet(guido) == 'Hello, Guido!'
+    assert other.greet(guido, greeting='Hi') == 'Hi, Guido!'
+
+
+@ifdebug
+def test_descriptors_without_owner():
+    def transformer(cls):
+        for name in 'first_name', 'last_name', 'age':
+            setattr(cls, name, interface.InterfaceAttribute(name, None))
+        cls.greet = interface.InterfaceMethod('greet', cls.greet)
+        return cls
+
+    @implements(People, transformer=transformer)
+    class Custom:
+        first_name = last_name = age = None
+        def greet(self, person):
+            return 'Hi, {.first_name}.'.format(person)
+
+    custom = Custom()
+    custom.first_name = 'Ann'
+    assert custom.greet(Person()) == 'Hi, None.'
+    assert vars(Custom)['greet'].interfaces == [People]
+    with pytest.raises(AssertionError):
+        custom.age = 200
+
+
+sampled = []
+
+
+class Counted (Interface):
+
+    __policy__ = Sample(2)
+
+    def count(self, value):
+        sampled.append(value)
+
+
+@implements(Counted)
+class Counter:
+
+    def count(self, value):
+        return value
+
+
+@ifdebug
+def test_profiling_keeps_policy_state():
+    del sampled[:]
+    counter = Counter()
+    counter.count(1)
+    interface.profile()
+    counter.count(2)
+    counter.count(3)
+    interface.unprofile()
+    counter.count(4)
+    counter.count(5)
+    assert sampled == [1, 3, 5]
@@ -1,4 +1,9 @@
+import array
+import io
 import operator
+import pickle
+
+import pytest
 
 from nox import magic
 
@@ -97,3 +102,220 @@ def test_enum_arithmetics():
 
 def test_enum_containment():
     assert Weekday.MONDAY in Weekday.MONDAY not in Weekday.SUNDAY
+
+
+def test_enum_lookup():
+    assert Weekday['FRIDAY'] is Weekday.FRIDAY
+    assert Weekday(4) is Weekday.FRIDAY
+    assert Weekday(Weekday.FRIDAY) is Weekday.FRIDAY
+    assert len(Weekday) == 7
+    assert len(magic.Enum) == 0
+    assert not hasattr(Weekday.MONDAY, '__dict__')
+
+
+def test_enum_arithmetics_wrap():
+    assert Weekday.MONDAY - 1 is Weekday.SUNDAY
+    assert list(Weekday)[-1] + 0 is Weekday.SUNDAY
+
+
+def test_enum_set():
+    weekend = Weekday.SATURDAY | Weekday.SUNDAY
+    assert isinstance(weekend, magic.EnumSet)
+    assert Weekday.SUNDAY in weekend
+    assert Weekday.MONDAY not in weekend
+    assert list(weekend) == [Weekday.SATURDAY, Weekday.SUNDAY]
+    assert len(weekend) == 2
+
+    workdays = magic.EnumSet(Weekday, Weekday) - weekend
+    assert len(workdays) == 5
+    assert not workdays & weekend
+    assert workdays | weekend == magic.EnumSet(Weekday, Weekday)
+    assert workdays ^ Weekday.MONDAY == magic.EnumSet(Weekday, [
+        Weekday.TUESDAY, Weekday.WEDNESDAY,
+        Weekday.THURSDAY, Weekday.FRIDAY,
+    ])
+    assert weekend <= magic.EnumSet(Weekday, Weekday) >= workdays
+    assert not weekend <= workdays
+    assert int(weekend) == weekend.bits == 0b1100000
+    assert 5 not in weekend
+    with pytest.raises(TypeError):
+        Weekday.MONDAY + weekend
+    assert repr(weekend) == (
+        'EnumSet(Weekday, [Weekday.SATURDAY, Weekday.SUNDAY])')
+
+
+def test_enum_set_rejects_foreign_members():
+    class Color (magic.Enum):
+
+        RED
+        GREEN
+
+    with pytest.raises(TypeError):
+        magic.EnumSet(Weekday, [Color.RED])
+    with pytest.raises(TypeError):
+        Weekday.MONDAY | Color.RED
+    assert Color.RED not in magic.EnumSet(Weekday, Weekday)
+
+
+def test_enum_set_packing():
+    sets = [magic.EnumSet(Weekday, bits=bits) for bits in (0, 5, 127)]
+    packed = magic.EnumSet.pack(Weekday, sets)
+    assert packed.typecode == 'Q' and list(packed) == [0, 5, 127]
+    assert magic.EnumSet.unpack(Weekday, packed) == sets
+    assert magic.EnumSet.unpack(Weekday, [0, 5, 127]) == sets
+    assert magic.EnumSet.unpack(Weekday, memoryview(packed)) == sets
+    assert magic.EnumSet.unpack(Weekday, array.array('i', [0, 5, 127])) == sets
+    with pytest.raises(ValueError):
+        magic.EnumSet.unpack(Weekday, [128])
+    with pytest.raises(ValueError):
+        magic.EnumSet(Weekday, bits=-1)
+
+    Wide = magic._EnumMeta('Wide', (), dict(
+        _fields=['M{}'.format(n) for n in range(100)]))
+    wide = [Wide.M0 | Wide.M99, magic.EnumSet(Wide, [Wide.M64])]
+    packed = magic.EnumSet.pack(Wide, wide)
+    assert len(packed) == 4
+    assert magic.EnumSet.unpack(Wide, packed) == wide
+
+
+class Pixel (magic.NamedTuple):
+
+    x
+    y
+    day
+
+
+def test_pickling():
+    for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+        assert pickle.loads(pickle.dumps(Weekday.FRIDAY, protocol)) is (
+            Weekday.FRIDAY)
+        pixel = pickle.loads(pickle.dumps(Pixel(1, 2, Weekday.MONDAY)))
+        assert type(pixel) is Pixel
+        assert pixel.day is Weekday.MONDAY
+
+
+def test_codec():
+    pixels = [Pixel(n, n / 2, Weekday(n % 7)) for n in range(10)]
+    codec = magic.Codec(Pixel, x='i', y='d', day=Weekday)
+    data = codec.encode(pixels)
+    assert len(data) == 13 * len(pixels)
+    assert list(codec.decode(data)) == pixels
+    assert list(codec.decode(data))[3].day is Weekday.THURSDAY
+
+    stream = io.BytesIO()
+    codec.chunk = 3
+    codec.dump(iter(pixels), stream)
+    stream.seek(0)
+    assert list(codec.load(stream)) == pixels
+
+
+def test_codec_pickle_fallback():
+    pixels = [Pixel(n, str(n), Weekday(n % 7)) for n in range(10)]
+    codec = magic.Codec(Pixel, x='i')
+    assert codec.struct is None
+    assert list(codec.decode(codec.encode(pixels))) == pixels
+
+    stream = io.BytesIO()
+    codec.chunk = 4
+    codec.dump(pixels, stream)
+    stream.seek(0)
+    decoded = list(codec.load(stream))
+    assert decoded == pixels
+    assert decoded[0].day is Weekday.MONDAY
+
+
+def test_table():
+    table = Pixel.Table(x='i', y='d')
+    assert len(table) == 0
+    table.extend(Pixel(n, n / 2, Weekday(n % 7)) for n in range(10))
+    table.append((10, 5.0, Weekday.MONDAY))
+    assert len(table) == 11
+    assert repr(table) == '<Pixel.Table (11 rows)>'
+
+    row = table[3]
+    assert type(row) is Pixel
+    assert row == (3, 1.5, Weekday.THURSDAY)
+    assert table[-1].day is Weekday.MONDAY
+    assert table[1:3] == [Pixel(1, 0.5, Weekday.TUESDAY),
+                          Pixel(2, 1.0, Weekday.WEDNESDAY)]
+    assert list(table)[10] == Pixel(10, 5.0, Weekday.MONDAY)
+
+    xs = table.column('x')
+    assert xs.typecode == 'i' and sum(xs) == 55
+    assert memoryview(table.column('y')).format == 'd'
+    assert table.column('day')[0] is Weekday.MONDAY
+
+    with pytest.raises(TypeError):
+        table.extend([Pixel(11, 5.5, Weekday.MONDAY), Pixel('x', 0, None)])
+    with pytest.raises(ValueError):
+        table.extend([(11, 5.5)])
+    with pytest.raises(ValueError):
+        table.append((11, 5.5, Weekday.MONDAY, 'extra'))
+    table.chunk = 2
+    with pytest.raises(ValueError):
+        table.extend([Pixel(11, 5.5, Weekday.MONDAY)] * 3 + [(12, 6.0)])
+    assert len(table) == 11
+    assert [len(column) for column in table.columns] == [11, 11, 11]
+    table.extend(Pixel(n, n / 2, Weekday(n % 7)) for n in range(11, 16))
+    assert len(table) == 16 and table[15].x == 15
+
+    with pytest.raises(TypeError):
+        Pixel.Table(z='i')
+
+
+class Ledger (magic.NamedTuple):
+
+    record
+    rows
+
+
+def test_table_fields_named_like_arguments():
+    table = Ledger.Table([(1, 2)], record='i', rows='q')
+    assert [column.typecode for column in table.columns] == ['i', 'q']
+    assert table[0] == Ledger(1, 2)
+
+
+def test_placeholder_expressions():
+    X = magic.X
+
+    class Item:
+        def __init__(self, price, tags):
+            self.price, self.tags = price, tags
+
+    items = [Item(3, {'qty': 1}), Item(5, {'qty': 4})]
+    assert list(map(X.price * 2, items)) == [6, 10]
+    assert list(map(X.tags['qty'] + 1, items)) == [2, 5]
+    assert list(map(10 - X.price, items)) == [7, 5]
+    assert list(map(X.price * X.tags['qty'], items)) == [3, 20]
+    assert list(map(-X, [1, -2])) == [-1, 2]
+    assert list(map(abs(X), [1, -2])) == [1, 2]
+    assert list(map(~X, [0])) == [-1]
+    assert list(filter(X.price > 4, items)) == [items[1]]
+    assert list(map(X == 2, [1, 2])) == [False, True]
+    assert sorted(items, key=-X.price) == items[::-1]
+
+    assert X.replace('l', 'L')('hello') == 'heLLo'
+    assert X.split(sep=',')('a,b') == ['a', 'b']
+    assert list(map(magic.call(X.split, ','), ['a,b'])) == [['a', 'b']]
+    assert list(map(magic.call(X.startswith, 'a'), ['ab', 'ba'])) == [
+        True, False]
+    assert magic.call(X.get, 'k')({'k': 1}) == 1
+    assert X.real(5) == 5
+    assert {X: 1}[X] == 1
+    assert X[1:]('abc') == 'bc'
+    assert X(42) == 42
+
+
+def test_placeholder_compilation():
+    X = magic.X
+    expression = (X.real + 1) * 2
+    function = magic.compiled(expression)
+    assert function(3) == 8
+    assert magic.compiled(expression) is function
+    other = (X.real + 5) * 3
+    assert other(3) == 24
+    assert magic.compiled(other).__code__ is function.__code__
+    assert expression(3) == 8
+    assert not hasattr(X, '__wrapped__')
+    with pytest.raises(TypeError):
+        iter(X)